@@ -1,10 +1,17 @@
-from os import makedirs
+from os import O_CREAT, O_TRUNC, O_WRONLY, close, makedirs, open as open_fd, scandir, write
+from sys import intern
 from shutil import copy
+from functools import cache
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from plistlib import load as load_plist
+from plistlib import loads as loads_plist
 from urllib.parse import urlparse, parse_qs, quote
-from json import dump as dump_json, load as load_json
-from typing import Generator, Iterable, Self, TypeAlias
+from json import dumps as dumps_json
+from typing import Any, Callable, Generator, Iterable, TypeAlias
+try:
+	from orjson import loads as loads_json
+except ImportError:  # orjson can't be installed everywhere (a-Shell included), so fall back to the standard library
+	from json import loads as loads_json
 
 # Constants
 ROOT_STR = "(root)"
@@ -14,6 +21,8 @@ ALIAS_SEPARATOR = " or "  # For now at least, this isn't localized
 BASE_PATH = Path("/System/Library")
 UNKNOWN_PLACEHOLDER = "UNKNOWN_LABEL"
 OVERRIDES = Path("./overrides")
+BUNDLE_LOADING_THREADS = 8
+FILE_WRITING_THREADS = 4
 
 # Folders in /System/Library/ known to contain bundles with Settings URLs
 BUNDLE_LOCATIONS = (
@@ -38,45 +47,87 @@ all_locales: set[str] = set()  # All the locales that have strings defined in lo
 # Currently supported: url, label_id
 url_corrections: dict[str, dict[str, str]] = {}
 alias_localizations: dict[str, dict[str, LocalizationString]] = {}  # If an alias is also a listed URL, let it inherit the localizations
-# List of URLs that need to have new overrides created for them
-urls_to_override: list[NewOverride] = []
+# URLs that need to have new overrides created for them, keyed by URL so aliases can remove them cheaply
+urls_to_override: dict[str, NewOverride] = {}
+# Flattened device-specific labels, keyed by id() of the label dictionary.
+# The dictionary is stored alongside its flattened label to keep it alive, so its id can't be reused.
+sanitized_labels: dict[int, tuple[dict, str]] = {}
 
-def build_url(segments: Iterable[str]) -> str:
+def split_url_fragment(segments: tuple[str, ...]) -> tuple[tuple[str, ...], str]:
+	"""
+	Separate the fragment (if any) from the rest of a Settings URL's path segments.
+	:param segments: Path segments of the URL, starting with the scheme
+	:return: Path segments without the fragment, and the fragment including its "#" (or an empty string)
+	"""
+	if len(segments) > 1 and segments[-1].startswith("#"):
+		return segments[:-1], segments[-1]
+	return segments, ""
+
+
+def build_navigation_url(segments: tuple[str, ...]) -> str:
+	"""
+	Construct a settings-navigation: URL, where the segments make up a regular path.
+	:param segments: Path segments of the URL, starting with the scheme
+	:return: Reconstructed URL
+	"""
+	path_segments, url_fragment = split_url_fragment(segments)
+	return path_segments[0] + "://" + quote("/".join(path_segments[1:])) + url_fragment
+
+
+def build_query_url(segments: tuple[str, ...]) -> str:
+	"""
+	Construct a URL where the path is given in root= and path= parameters, as in prefs: and bridge:.
+	:param segments: Path segments of the URL, starting with the scheme
+	:return: Reconstructed URL
+	"""
+	path_segments, url_fragment = split_url_fragment(segments)
+	constructed_url = path_segments[0] + ":"
+	if len(path_segments) > 1:
+		constructed_url += "root=" + path_segments[1]
+		if len(path_segments) > 2:
+			constructed_url += "&path=" + quote("/".join(path_segments[2:]))
+	return constructed_url + url_fragment
+
+
+# URL builders for schemes that don't use root= and path= parameters
+# So far, bridge and prefs are the same, and settings-navigation is the odd one out.
+# No other schemes seem to be around so far. If more pop up, add them here.
+URL_BUILDERS = {
+	"settings-navigation": build_navigation_url
+}
+
+
+@cache
+def build_url(segments: tuple[str, ...]) -> str:
 	"""
 	Construct a Settings URL string from its path segments.
-	:param segments: Iterable of segments to build the URL
+	The result is cached, since the same URLs get rebuilt while searching for missing URLs and applying aliases.
+	:param segments: Tuple of segments to build the URL
 	:return: Reconstructed URL
 	"""
-	segments_list = [*segments]
-	if len(segments_list) == 0:
+	if len(segments) == 0:
 		return ""
-	url_scheme = segments_list[0]
-	constructed_url = url_scheme + ":"
-	# TODO: if more schemes pop up, find a more general way to handle them.
-	# So far, bridge and prefs are the same, and settings-navigation is the odd one out.
-	# No other schemes seem to be around so far.
-	if url_scheme == "settings-navigation":
-		constructed_url += "//"
-	if len(segments_list) > 1:
-		url_fragment = segments_list[-1] if segments_list[-1].startswith("#") else None
-		if url_fragment is not None:
-				segments_list.pop()
-		if url_scheme == "settings-navigation":
-			constructed_url += quote("/".join(segments_list[1:]))
-			if url_fragment is not None:
-				constructed_url += url_fragment
-		else:
-			constructed_url += "root=" + segments_list[1]
-			if len(segments_list) > 2:
-				constructed_url += "&path=" + quote("/".join(segments_list[2:]))
-		if url_fragment is not None:
-			constructed_url += url_fragment
-	return constructed_url
+	return URL_BUILDERS.get(segments[0], build_query_url)(segments)
 
 
-def get_path_segments(url: str) -> Generator[str, None, None]:
+@cache
+def get_path_segments(url: str) -> tuple[str, ...]:
+	"""
+	Split a Settings URL into its path segments.
+	The same URLs get split many times while building the tree and applying aliases,
+	so the result is cached per URL string.
+	Segments are interned, since the same few (schemes, roots, common path parts) are repeated across thousands of URLs
+	and they're all used as keys in the tree.
+	:param url: URL to split
+	:return: Tuple of the path segments.
+	"""
+	return tuple(intern(segment) for segment in iter_path_segments(url))
+
+
+def iter_path_segments(url: str) -> Generator[str, None, None]:
 	"""
 	Iterate the path segments in a Settings URL.
+	Use get_path_segments instead unless the URL is only ever split once.
 	:param url: URL to split
 	:return: Generator that yields the path segments.
 	"""
@@ -110,6 +161,36 @@ def get_path_segments(url: str) -> Generator[str, None, None]:
 		yield "#" + parsed.fragment  # prefix with "#" avoid possible collisions with "real" paths
 
 
+def load_plist_file(path: str | Path):
+	"""
+	Load a property list file (plist, loctable, or strings).
+	The whole file is read at once and parsed in memory,
+	because parsing binary plists straight from a file does lots of small seeks and reads.
+	:param path: Path to the file
+	:return: Deserialized contents of the file
+	"""
+	with open(path, "rb") as fp:
+		return loads_plist(fp.read())
+
+
+def write_file(path: str | Path, contents: str | bytes):
+	"""
+	Write a whole text file at once, encoded as UTF-8.
+	This skips the buffered file object that open() would set up, since the contents are all ready anyway.
+	:param path: Path to the file
+	:param contents: Everything that goes in the file, or its already-encoded bytes
+	"""
+	if isinstance(contents, str):
+		contents = contents.encode("utf-8")
+	fd = open_fd(path, O_WRONLY | O_CREAT | O_TRUNC, 0o666)
+	try:
+		remaining = memoryview(contents)
+		while remaining:  # write() isn't guaranteed to write everything in one call
+			remaining = remaining[write(fd, remaining):]
+	finally:
+		close(fd)
+
+
 def sanitize_key(key: LocalizationString) -> str:
 	"""
 	Flatten a localization string entry into one string, handling the special cases where a label differs between devices.
@@ -122,12 +203,19 @@ def sanitize_key(key: LocalizationString) -> str:
 	"""
 	if type(key) is str:
 		return key
-	elif type(key) is dict and "NSStringDeviceSpecificRuleType" in key:
+	# The same label dictionaries get flattened once per locale, so remember the result
+	cached = sanitized_labels.get(id(key))
+	if cached is not None:
+		return cached[1]
+	sanitized = UNKNOWN_PLACEHOLDER  # Either unknown label, or unrecognized device type
+	if type(key) is dict and "NSStringDeviceSpecificRuleType" in key:
 		device_specific_labels: dict[str, str] = key["NSStringDeviceSpecificRuleType"]
 		for device_type in DEVICE_TYPES:
 			if device_type in device_specific_labels:
-				return device_specific_labels[device_type]
-	return UNKNOWN_PLACEHOLDER  # Either unknown label, or unrecognized device type
+				sanitized = device_specific_labels[device_type]
+				break
+	sanitized_labels[id(key)] = (key, sanitized)
+	return sanitized
 
 
 def merge_into(dictionary: dict, key: str, value: str | dict | list):
@@ -139,44 +227,74 @@ def merge_into(dictionary: dict, key: str, value: str | dict | list):
 	:param key: Key to set or merge the value for.
 	:value: Value to merge into the dictionary.
 	"""
-	if key in dictionary:
-		# Most of the time, the condition above will be false, but there may be locations with multiple URLs.
-		# "I like spaghetti." Time to run Currahee. Now here's three miles up and down of insane code.
-		existing_value = dictionary[key]
-		if existing_value == value:  # Avoid adding duplicate entries for the same value. Python compares element-wise.
-			return
-		if type(existing_value) is str:
-			if type(value) is dict:
-				dictionary[key] = value
-				merge_into(value, ROOT_STR, existing_value)
-			else:
-				if type(value) is str:
-					urls_list = [existing_value, value]
-					urls_list.sort()
-					dictionary[key] = urls_list
-				elif type(value) is list:
-					value.append(existing_value)
-					value.sort()
-					dictionary[key] = value
-		elif type(existing_value) is list:
-			if type(value) is dict:
-				dictionary[key] = value
-				merge_into(value, ROOT_STR, existing_value)
-			else:
-				if type(value) is str:
-					existing_value.append(value)
-				elif type(value) is list:
-					existing_value += value
-				existing_value.sort()
-		elif type(existing_value) is dict:
-			if type(value) is dict:
-				for key, sub_value in value.items():
-					merge_into(existing_value, key, sub_value)
-			else:
-				merge_into(existing_value, ROOT_STR, value)
-	else:
+	existing_value = dictionary.get(key)  # Values are never None
+	if existing_value is None:
+		# Most of the time, the key won't be there yet, so handle that first without any type checks.
 		dictionary[key] = value
+		return
+	# There may be locations with multiple URLs, though.
+	# "I like spaghetti." Time to run Currahee. Now here's three miles up and down of insane code.
+	if existing_value == value:  # Avoid adding duplicate entries for the same value. Python compares element-wise.
+		return
+	MERGE_HANDLERS[type(existing_value), type(value)](dictionary, key, existing_value, value)
+
+
+# Handlers for merge_into, for each combination of existing and new value types.
+# Each one takes the dictionary, the key, the existing value, and the new value.
+def merge_dict_into_dict(dictionary: dict, key: str, existing_value: dict, value: dict):
+	for sub_key, sub_value in value.items():
+		if sub_key in existing_value:
+			merge_into(existing_value, sub_key, sub_value)
+		else:
+			existing_value[sub_key] = sub_value
+
 
+def merge_urls_into_dict(dictionary: dict, key: str, existing_value: dict, value: str | list[str]):
+	merge_into(existing_value, ROOT_STR, value)
+
+
+def merge_dict_into_urls(dictionary: dict, key: str, existing_value: str | list[str], value: dict):
+	# Existing value is a string or list, so it becomes the root of the new dictionary
+	dictionary[key] = value
+	merge_into(value, ROOT_STR, existing_value)
+
+
+# Lists are re-sorted with sort() rather than bisect.insort(), because a list from a URL with aliases
+# starts out as [url, *aliases], which isn't necessarily sorted. Appending to an already sorted list
+# and sorting it again is close to linear anyway.
+def merge_str_into_str(dictionary: dict, key: str, existing_value: str, value: str):
+	urls_list = [existing_value, value]
+	urls_list.sort()
+	dictionary[key] = urls_list
+
+
+def merge_list_into_str(dictionary: dict, key: str, existing_value: str, value: list[str]):
+	value.append(existing_value)
+	value.sort()
+	dictionary[key] = value
+
+
+def merge_str_into_list(dictionary: dict, key: str, existing_value: list[str], value: str):
+	existing_value.append(value)
+	existing_value.sort()
+
+
+def merge_list_into_list(dictionary: dict, key: str, existing_value: list[str], value: list[str]):
+	existing_value += value
+	existing_value.sort()
+
+
+MERGE_HANDLERS: dict[tuple[type, type], Callable[[dict, str, Any, Any], None]] = {
+	(str, str): merge_str_into_str,
+	(str, list): merge_list_into_str,
+	(str, dict): merge_dict_into_urls,
+	(list, str): merge_str_into_list,
+	(list, list): merge_list_into_list,
+	(list, dict): merge_dict_into_urls,
+	(dict, str): merge_urls_into_dict,
+	(dict, list): merge_urls_into_dict,
+	(dict, dict): merge_dict_into_dict
+}
 
 
 class RawSettingsURL:
@@ -185,8 +303,13 @@ class RawSettingsURL:
 	"""
 	def __init__(self, url: str, label_id: str, manifest_path: Path):
 		# Apply corrections before any further processing
-		self.url = url_corrections[url].get("url", url) if url in url_corrections else url
-		self.label_id = url_corrections[url].get("label_id", label_id) if url in url_corrections else label_id
+		correction = url_corrections.get(url) if url_corrections else None  # Skip the lookup entirely without any corrections
+		if correction is not None:
+			self.url = correction.get("url", url)
+			self.label_id = correction.get("label_id", label_id)
+		else:
+			self.url = url
+			self.label_id = label_id
 		self.manifest_path = manifest_path
 		self.localized_labels: dict[str, LocalizationString] = {}
 		self.aliases: list[str] | None = None
@@ -196,16 +319,10 @@ class RawSettingsURL:
 			self.aliases = []
 		self.aliases.append(url)
 		alias_localizations[url] = self.localized_labels
-		override_idx = 0
-		# If any overrides would be created with the same URL as this alias, then delete them
+		# If an override would be created with the same URL as this alias, then delete it
 		# We do this here, which may be in a recursively automatically generated alias,
 		# to get all aliases
-		while override_idx < len(urls_to_override):
-			override = urls_to_override[override_idx]
-			if override["url"] == url:
-				del urls_to_override[override_idx]
-			else:
-				override_idx += 1
+		urls_to_override.pop(url, None)
 
 
 class Manifest:
@@ -224,8 +341,7 @@ class Manifest:
 		"""
 		# Load the actual URLs here. Delegate loading strings to the bundle.
 		# Overrides will be handled externally.
-		with open(self.path, "rb") as ssm:
-			self.urls.extend(RawSettingsURL(plist_url["searchURL"], plist_url["label"], self.path) for plist_url in load_plist(ssm)["items"])
+		self.urls.extend(RawSettingsURL(plist_url["searchURL"], plist_url["label"], self.path) for plist_url in load_plist_file(self.path)["items"])
 
 
 class Bundle:
@@ -248,17 +364,21 @@ class Bundle:
 		"""
 		Load the URLs and localizations from the files in the bundle.
 		"""
-		for file in self.path.iterdir():
+		# scandir() provides file types along with the names, which saves a stat per entry
+		with scandir(self.path) as bundle_entries:
+			bundle_files = list(bundle_entries)
+		for file in bundle_files:
 			if file.is_file() and file.name.startswith("SettingsSearchManifest"):
-				if file.name.endswith(".plist"):
+				# Split off the extension once; the rest of the path is the key for the manifest and its strings
+				manifest_key, _, extension = file.path.rpartition(".")
+				if extension == "plist":
 					# Create a manifest
-					manifest = Manifest(file)
-					self.manifests[str(file).removesuffix(".plist")] = manifest
+					manifest = Manifest(Path(file.path))
+					self.manifests[manifest_key] = manifest
 					manifest.load()
-				elif file.name.endswith(".loctable"):
+				elif extension == "loctable":
 					# Load loctable
-					with open(file, "rb") as loctable_file:
-						loctable_contents: dict[str, dict[str, LocalizationString]] = load_plist(loctable_file)
+					loctable_contents: dict[str, dict[str, LocalizationString]] = load_plist_file(file.path)
 					# For this purupose, LocProvenance is not useful, so delete it and pretend it never existed
 					if "LocProvenance" in loctable_contents:
 						del loctable_contents["LocProvenance"]
@@ -266,26 +386,27 @@ class Bundle:
 					# because we need to preprocess them first (merge lproj and loctable)
 					# and also because the manifest may not exist yet,
 					# if the loctable or lproj is loaded before the actual manifest.
-					self.loctables[str(file).removesuffix(".loctable")] = loctable_contents
-				elif file.name.endswith(".strings"):
+					self.loctables[manifest_key] = loctable_contents
+				elif extension == "strings":
 					# This is a special case, where there's a single strings file alongside the plist.
 					# Since a strings file only has one level, there's only one localization language.
 					# Assume it'll be English. All locales will end up using these translations.
 					all_locales.add(FALLBACK_LOCALE)
-					en_loc_dict = self.lproj_strings.setdefault(str(file).removesuffix(".strings"), {}).setdefault(FALLBACK_LOCALE, {})
-					with open(file, "rb") as strings_file:
-						en_loc_dict.update(load_plist(strings_file))
+					en_loc_dict = self.lproj_strings.setdefault(manifest_key, {}).setdefault(FALLBACK_LOCALE, {})
+					en_loc_dict.update(load_plist_file(file.path))
 			elif file.is_dir() and file.name.endswith(".lproj"):
 				# Load lproj
 				# Reasoning for why the strings aren't saved to the manifest directly
 				# is the same as for loctable logic
-				lang = file.name.removesuffix(".lproj")
+				lang = intern(file.name.removesuffix(".lproj"))
 				all_locales.add(lang)
-				for lproj_file in file.iterdir():
-					if lproj_file.is_file() and lproj_file.name.startswith("SettingsSearchManifest") and lproj_file.name.endswith(".strings"):
-						loc_dict = self.lproj_strings.setdefault(str(lproj_file).removesuffix(".strings"), {}).setdefault(lang, {})
-						with open(lproj_file, "rb") as lproj_plist:
-							loc_dict.update(load_plist(lproj_plist))
+				with scandir(file.path) as lproj_files:
+					for lproj_file in lproj_files:
+						# Check the name first, since .lproj folders are full of other strings files
+						lproj_file_name = lproj_file.name
+						if lproj_file_name.startswith("SettingsSearchManifest") and lproj_file_name.endswith(".strings") and lproj_file.is_file():
+							loc_dict = self.lproj_strings.setdefault(lproj_file.path.removesuffix(".strings"), {}).setdefault(lang, {})
+							loc_dict.update(load_plist_file(lproj_file.path))
 
 		# Now assign labels to URLs
 		for manifest_name, manifest in self.manifests.items():
@@ -297,14 +418,16 @@ class Bundle:
 				manifest_strings.update(self.loctables[manifest_name])
 			# Save strings to their manifests to allow efficiently labeling overrides later
 			manifest.strings = manifest_strings
-			# Assign localized labels to URLs
-			for url in manifest.urls:
-				for locale, locale_strs in manifest_strings.items():
-					if url.label_id in locale_strs:
+			# Assign localized labels to URLs, one locale at a time
+			for locale, locale_strs in manifest_strings.items():
+				get_label = locale_strs.get
+				for url in manifest.urls:
+					label = get_label(url.label_id)
+					if label is not None:
 						# URLs with localized labels
-						if len(locale_strs[url.label_id]) == 0:
+						if len(label) == 0:
 							raise Exception(f"Empty label for URL {url.url}, locale {locale}. Please adjust overrides as necessary.")
-						url.localized_labels[locale] = locale_strs[url.label_id]
+						url.localized_labels[locale] = label
 
 		# Now that labels are all assigned, clear the label dictionaries - we don't need them anymore
 		# Hopefully this helps reduce memory consumption a tiny bit
@@ -318,50 +441,123 @@ class URLTree:
 		self.root: RawSettingsURL | None = None
 		self.urls: dict[str, URLTree] = {}
 
-	def build_localized_tree(self, locale: str) -> dict | str | list[str]:
+	def build_exports(self, locales: Iterable[str]) -> dict[str, tuple[dict | str | list[str], list[str]]]:
 		"""
-		Builds a localized sub-dictionary of URLs for export.
-		:param locale: Locale
-		:return: Dictionary of URLs with localized labels, or just the URL.
+		Builds the localized dictionary of URLs and the localized Markdown list of URLs for export, in several locales at once.
+		This instance of URLTree must be the root of the tree for an entire scheme (bridge or prefs), or a combination of schemes.
+		Locales without any labels of their own in this tree would come out exactly the same as the fallback locale,
+		so they aren't built separately and share the fallback locale's exports instead.
+		:param locales: Locales to build the exports for
+		:return: Dictionary mapping each locale to its localized dictionary of URLs and its Markdown lines.
+		"""
+		locales = tuple(locales)
+		# Only look for translations when there are other locales to share the fallback locale's exports with
+		if FALLBACK_LOCALE in locales and len(locales) > 1:
+			translated_locales = self.find_translated_locales()
+			built_locales = [locale for locale in locales if locale == FALLBACK_LOCALE or locale in translated_locales]
+		else:
+			built_locales = locales
+		markdown_lines: dict[str, list[str]] = {locale: [] for locale in built_locales}
+		markdown_prefixes = dict.fromkeys(markdown_lines, "- ")
+		if self.root is not None:
+			# The scheme itself has a URL. Its label doesn't get a separator after it.
+			labels = self.root.localized_labels
+			fallback_label = labels.get(FALLBACK_LOCALE)
+			urls_str = self.build_markdown_urls()
+			for locale, locale_markdown_lines in markdown_lines.items():
+				label = labels.get(locale, fallback_label)
+				markdown_prefixes[locale] = self.add_markdown_line(locale_markdown_lines, locale, "- ", None if label is None else sanitize_key(label), urls_str)
+		localized_trees = self.build_localized_trees(markdown_lines, markdown_lines, markdown_prefixes)
+		exports = {locale: (localized_trees[locale], locale_markdown_lines) for locale, locale_markdown_lines in markdown_lines.items()}
+		return {locale: exports[locale] if locale in exports else exports[FALLBACK_LOCALE] for locale in locales}
+
+	def find_translated_locales(self) -> set[str]:
+		"""
+		Find the locales that have a label different from the fallback locale's anywhere in this tree.
+		:return: Set of locales with their own labels
+		"""
+		translated_locales: set[str] = set()
+		pending: list[URLTree] = [self]
+		while pending:
+			subtree = pending.pop()
+			if subtree.root is not None:
+				labels = subtree.root.localized_labels
+				fallback_label = labels.get(FALLBACK_LOCALE)
+				translated_locales.update(locale for locale, label in labels.items() if label != fallback_label)
+			pending.extend(subtree.urls.values())
+		return translated_locales
+
+	def build_localized_trees(self, locales: Iterable[str], markdown_lines: dict[str, list[str]], markdown_prefixes: dict[str, str]) -> dict[str, dict | str | list[str]]:
+		"""
+		Builds localized sub-dictionaries of URLs for export in several locales at once,
+		and adds the Markdown lines for the URLs in this subtree along the way.
+		The structure of the tree is the same in every locale, so it only needs to be walked once,
+		and each label only needs to be looked up once for both the dictionary and the Markdown list.
+		:param locales: Locales to build the tree for
+		:param markdown_lines: Markdown lines for each locale, to add lines for this subtree's children to
+		:param markdown_prefixes: Everything to come at the start of the human-readable left side of the lines for this subtree's children, for each locale
+		:return: Dictionary mapping each locale to its dictionary of URLs with localized labels, or just the URL.
 		"""
 		if len(self.urls) == 0 and self.root is not None:
 			# The root URL is the only thing available for this sub-path
 			# Apply aliases -- return a list instead of a string
+			# Every locale gets its own list, since merge_into may modify it
 			if self.root.aliases is not None:
-				return [self.root.url, *self.root.aliases]
-			return self.root.url
+				return {locale: [self.root.url, *self.root.aliases] for locale in locales}
+			return dict.fromkeys(locales, self.root.url)
 		else:
-			result = {}
-			unassigned_id = 0
+			results: dict[str, dict] = {locale: {} for locale in locales}
+			unassigned_ids = dict.fromkeys(results, 0)
 			if self.root is not None:
-				merge_into(result, ROOT_STR, self.root.url)
+				for result in results.values():
+					merge_into(result, ROOT_STR, self.root.url)
 			for subtree in self.urls.values():
-				if subtree.root is not None:
-					key_locale = locale if locale in subtree.root.localized_labels else FALLBACK_LOCALE
-					if key_locale in subtree.root.localized_labels:
-						key = sanitize_key(subtree.root.localized_labels[key_locale])
+				# Each node's labels are looked up exactly once per locale here, and reused for both exports.
+				labels = subtree.root.localized_labels if subtree.root is not None else {}
+				get_label = labels.get
+				fallback_label = get_label(FALLBACK_LOCALE)
+				keys: dict[str, str] = {}
+				subtree_prefixes: dict[str, str] = {}
+				# The URLs on the right side of the line are the same in every locale
+				urls_str = subtree.build_markdown_urls() if subtree.root is not None else None
+				for locale in results:
+					label = get_label(locale, fallback_label)
+					if label is not None:
+						label = keys[locale] = sanitize_key(label)
 					else:
-						key = f"{UNKNOWN_PLACEHOLDER}_{unassigned_id}"
-						unassigned_id += 1
-				else:
-					key = f"{UNKNOWN_PLACEHOLDER}_{unassigned_id}"
-					unassigned_id += 1
-				merge_into(result, key, subtree.build_localized_tree(locale))
-			return result
-
-	def build_markdown_lines(self, locale: str, prefix: str = "- ", should_label: bool = False) -> Generator[str, None, None]:
+						keys[locale] = f"{UNKNOWN_PLACEHOLDER}_{unassigned_ids[locale]}"
+						unassigned_ids[locale] += 1
+					# The subtree's own line has to come before the lines for its children
+					subtree_prefixes[locale] = subtree.add_markdown_line(markdown_lines[locale], locale, markdown_prefixes[locale], label, urls_str) + SEPARATOR
+				subtree_results = subtree.build_localized_trees(results, markdown_lines, subtree_prefixes)
+				for locale, result in results.items():
+					merge_into(result, keys[locale], subtree_results[locale])
+			return results
+
+	def build_markdown_urls(self) -> str:
+		"""
+		Build the right side of the Markdown line for this tree's root URL, which doesn't depend on the locale.
+		This tree must have a root URL.
+		:return: The root URL and any aliases, formatted as code
 		"""
-		Build a localized Markdown list of URLs for export.
+		# Apply aliases if any exist
+		urls_for_line = [self.root.url]
+		if self.root.aliases is not None:
+			urls_for_line += self.root.aliases
+		return ALIAS_SEPARATOR.join(f"`{line_url}`" for line_url in urls_for_line)
+
+	def add_markdown_line(self, lines: list[str], locale: str, prefix: str, label: str | None, urls_str: str | None) -> str:
+		"""
+		Add the Markdown line for this tree's root URL, if it has one.
+		:param lines: Markdown lines to add to
 		:param locale: Locale
 		:param prefix: Everything to come at the start of the human-readable left side of the line.
-		:param should_label: Whether this tree's root node has a label. If false, then this is the root of the tree for an entire scheme (bridge or prefs).
-		:return: Generator that yields a full Markdown list of the URLs in this subtree.
+		:param label: Localized label for the root URL, or None if there is no label.
+		:param urls_str: Right side of the line from build_markdown_urls(), or None if there is no root URL.
+		:return: Prefix with this tree's label (or a placeholder, if there isn't one) added, for the lines of its children
 		"""
 		if self.root is not None:
-			locale_key = locale if locale in self.root.localized_labels else FALLBACK_LOCALE
-			if locale_key in self.root.localized_labels:
-				label = sanitize_key(self.root.localized_labels[locale_key])
-			else:
+			if label is None:
 				label = UNKNOWN_PLACEHOLDER
 				# Print usages of the fallback label. They need to be addressed before publishing.
 				# This does not trigger when overrides are needed to fill in gaps.
@@ -371,19 +567,10 @@ class URLTree:
 					print("  Manifest: " + str(self.root.manifest_path))
 					print("  Label ID: " + self.root.label_id)
 			prefix += label
-			# Apply aliases if any exist
-			urls_for_line = [self.root.url]
-			if self.root.aliases is not None:
-				urls_for_line += self.root.aliases
-			urls_str = ALIAS_SEPARATOR.join(f"`{line_url}`" for line_url in urls_for_line)
-			yield f"{prefix}: {urls_str}"
-		elif should_label or len(prefix) > 2:  # Don't add to the label if this tree is for the entire URL scheme
+			lines.append(f"{prefix}: {urls_str}")
+		else:
 			prefix += UNKNOWN_PLACEHOLDER
-		if should_label:
-			prefix += SEPARATOR
-		# Generate the Markdown lines for child URLs
-		for child in self.urls.values():
-			yield from child.build_markdown_lines(locale, prefix, True)
+		return prefix
 
 	def add_url(self, url: RawSettingsURL):
 		"""
@@ -393,9 +580,11 @@ class URLTree:
 		current_tree = self
 		# Removed the enumerate thing, will add back only if absolutely needed
 		for path_segment in get_path_segments(url.url):
-			if path_segment not in current_tree.urls:
-				current_tree.urls[path_segment] = URLTree()
-			current_tree = current_tree.urls[path_segment]
+			# One lookup per segment; only allocate a subtree when it doesn't exist yet
+			next_tree = current_tree.urls.get(path_segment)
+			if next_tree is None:
+				next_tree = current_tree.urls[path_segment] = URLTree()
+			current_tree = next_tree
 		# Now current tree is the subtree for which the provided URL is the root
 		current_tree.root = url
 
@@ -409,18 +598,8 @@ class URLTree:
 		if self.root is not None and self.root.url == url:
 			self.root.add_alias(alias)  # Add alias to the URL directly
 			# Apply to children if recursive
-			# This isn't particularly efficient, I suppose, but it has to work.
 			if recursive:
-				# Generate this again
-				aliased_url_segments = list(get_path_segments(url))
-				alias_segments = list(get_path_segments(alias))
-				for url_key, child_tree in self.urls.items():
-					aliased_url_segments.append(url_key)
-					alias_segments.append(url_key)
-					# Add alias to the child tree
-					child_tree.add_alias(build_url(aliased_url_segments), build_url(alias_segments), recursive)
-					alias_segments.pop()
-					aliased_url_segments.pop()  # Prepare segments list for the next child
+				self.add_alias_to_children(get_path_segments(url), get_path_segments(alias))
 		else:
 			if path_segments_rev is None:
 				# I am reversing them now to make popping more efficient as the recursion goes deeper into the tree
@@ -433,21 +612,38 @@ class URLTree:
 				# This will stop silently if the alias is trying to be applied to something that doesn't exist
 				self.urls[next_segment].add_alias(url, alias, recursive, path_segments_rev)
 
-	def find_missing(self, segments: list[str] | None = None) -> Generator[tuple[str, Self], None, None]:
+	def add_alias_to_children(self, url_segments: tuple[str, ...], alias_segments: tuple[str, ...]):
 		"""
-		Find the missing URLs in the tree.
-		:param segments: Settings URL segments needed to reach the root of this URL tree
+		Recursively add an alias prefix to the children of a URL that has just been aliased.
+		The segments are passed down the tree, so URL strings only need to be built for the children themselves.
+		:param url_segments: Path segments of this tree's URL
+		:param alias_segments: Path segments of the alias for this tree's URL
 		"""
-		if segments is None:
-			segments = []
-		if self.root is None and len(segments) > 1:  # Ignore root of tree and URL schemes
-			yield (build_url(segments), self)
-		for key, subtree in list(self.urls.items()):
-			segments.append(key)
-			# This next line makes Pyright unhappy. Silence the error.
-			# "Generator[tuple[str, URLTree], None, Unknown]" is not assignable to "Generator[tuple[str, Self@URLTree], None, None]"
-			yield from subtree.find_missing(segments)  # pyright: ignore
-			segments.pop()
+		for url_key, child_tree in self.urls.items():
+			child_url_segments = (*url_segments, url_key)
+			# Children without a URL of their own (or with a different one) stop the alias from going further down
+			if child_tree.root is not None and child_tree.root.url == build_url(child_url_segments):
+				child_alias_segments = (*alias_segments, url_key)
+				child_tree.root.add_alias(build_url(child_alias_segments))
+				child_tree.add_alias_to_children(child_url_segments, child_alias_segments)
+
+	def find_missing(self) -> Generator[tuple[str, "URLTree"], None, None]:
+		"""
+		Find the missing URLs in the tree. This instance of URLTree must be the root of the tree.
+		:return: Generator that yields the URL string and subtree for each missing URL.
+		"""
+		# Depth-first walk with an explicit stack, paired with the URL segments needed to reach each subtree.
+		# Children are pushed in reverse so they come out in the same order as a recursive walk.
+		# Each subtree's children are only read after the subtree itself has been yielded,
+		# because filling in a missing URL may change the tree.
+		pending: list[tuple[URLTree, tuple[str, ...]]] = [(self, ())]
+		while pending:
+			subtree, segments = pending.pop()
+			if subtree.root is None and len(segments) > 1:  # Ignore root of tree and URL schemes
+				yield (build_url(segments), subtree)
+			children = [(child, (*segments, key)) for key, child in subtree.urls.items()]
+			children.reverse()
+			pending.extend(children)
 
 
 # Read Settings URL manifests and build a tree
@@ -455,43 +651,69 @@ tree = URLTree()
 manifests: dict[str, Manifest] = {}
 
 
-def load_bundle(bundle_path: Path):
+def load_bundle(bundle_path: Path) -> Bundle:
 	"""
-	Load a bundle and add its URLs to the tree.
+	Load a bundle's URLs and localizations, without adding anything to the tree.
+	This only touches the bundle itself, so it's safe to run for several bundles at once.
 	:param bundle_path: Path to the bundle
+	:return: Loaded bundle
 	"""
 	bundle = Bundle(bundle_path)
 	bundle.load()
+	return bundle
+
+
+def add_bundle(bundle: Bundle):
+	"""
+	Add a loaded bundle's manifests and URLs to the tree.
+	:param bundle: Bundle to add
+	"""
 	for bundle_manifest_id, bundle_manifest in bundle.manifests.items():
 		manifests[bundle_manifest_id] = bundle_manifest
 		for bundle_manifest_url in bundle_manifest.urls:
 			tree.add_url(bundle_manifest_url)
 
 
-def scan_folder(folder_path: Path):
+def scan_folder(folder_path: Path) -> list[Path]:
 	"""
-	Scan a folder recursively for Settings URLs and load bundles if found.
+	Scan a folder recursively for bundles that may contain Settings URLs.
 	:param folder_path: Path to the folder to scan
+	:return: Paths to the bundles found, in the order they should be added to the tree
 	"""
-	for file in folder_path.iterdir():
-		if file.is_dir():
-			if file.name.endswith(".bundle"):
-				load_bundle(file)
-			elif file.name != "_CodeSignature":
-				scan_folder(file)
+	bundle_paths: list[Path] = []
+	# Walk with an explicit stack of path strings instead of recursing.
+	# scandir() gets the file type along with the directory listing, so there's no extra stat per entry.
+	# Subfolders are pushed in reverse so that bundles are still found in the same order as a recursive walk.
+	folders_to_scan = [str(folder_path)]
+	while folders_to_scan:
+		current_folder = folders_to_scan.pop()
+		if current_folder.endswith(".bundle"):
+			bundle_paths.append(Path(current_folder))
+			continue
+		with scandir(current_folder) as entries:
+			subfolders = [entry.path for entry in entries if entry.is_dir() and entry.name != "_CodeSignature"]
+		subfolders.reverse()
+		folders_to_scan.extend(subfolders)
+	return bundle_paths
 
 
 # Load the corrections before scanning the system.
 # Corrections will be applied as soon as the affected URLs are loaded from the manifests.
-with open(OVERRIDES / "corrections.json") as fp:
-	url_corrections.update(load_json(fp))
+with open(OVERRIDES / "corrections.json", "rb") as fp:
+	url_corrections.update(loads_json(fp.read()))
 
 
-# Load all bundles at known locations
+# Find all bundles at known locations
+bundle_paths: list[Path] = []
 for bundle_location in BUNDLE_LOCATIONS:
-	scan_folder(BASE_PATH / bundle_location)
+	bundle_paths += scan_folder(BASE_PATH / bundle_location)
 # One known special case that isn't in a normal bundle
-load_bundle(BASE_PATH / "PrivateFrameworks" / "PBBridgeSupport.framework")
+bundle_paths.append(BASE_PATH / "PrivateFrameworks" / "PBBridgeSupport.framework")
+# Loading bundles is mostly waiting on file reads, so load several at once.
+# The results come back in order and are added to the tree one at a time, so the tree is built the same way every time.
+with ThreadPoolExecutor(max_workers=BUNDLE_LOADING_THREADS) as executor:
+	for loaded_bundle in executor.map(load_bundle, bundle_paths):
+		add_bundle(loaded_bundle)
 
 
 # Need both "fill-in-the-gap" overrides and "additional" overrides
@@ -529,15 +751,14 @@ def add_override(override: dict):
 
 
 # Inject "additional" overrides regardless of what's found
-with open(OVERRIDES / "add.json", "r") as fp:
-	additional_overrides: list[dict] = load_json(fp)
+with open(OVERRIDES / "add.json", "rb") as fp:
+	additional_overrides: list[dict] = loads_json(fp.read())
 for additional_override in additional_overrides:
 	add_override(additional_override)
 
 # Create a folder for the current iOS version under versions/
 # Doing this first so that the file containing the needed overrides has somewhere to go
-with open("/System/Library/CoreServices/SystemVersion.plist", "rb") as fp:
-	ios_version: str = load_plist(fp)["ProductVersion"]
+ios_version: str = load_plist_file("/System/Library/CoreServices/SystemVersion.plist")["ProductVersion"]
 version_folder = Path(".") / "versions" / ios_version
 makedirs(version_folder, exist_ok=True)
 
@@ -551,14 +772,22 @@ with open(OVERRIDES / "ignore.txt", "r") as fp:
 # These are only applied on an as-needed basis,
 # after the tree has been constructed.
 # Each gap override has the same structure as an "additional" override.
-with open(OVERRIDES / "gaps.json", "r") as fp:
-	gap_overrides: list[NewOverride] = load_json(fp)
+with open(OVERRIDES / "gaps.json", "rb") as fp:
+	gap_overrides: list[NewOverride] = loads_json(fp.read())
 
 
 # Instead of a plain text file listing the URLs, we'll create a skeleton JSON.
 # This should make the process of filling in localizations by hand less tedious.
-def find_missing_urls():
-	for missing_url_str, missing_url_tree in tree.find_missing():
+def find_missing_urls(missing_urls: Iterable[tuple[str, URLTree]]) -> list[tuple[str, URLTree]] | None:
+	"""
+	Fill in missing URLs from aliases and gap overrides, and record the ones that need new overrides.
+	:param missing_urls: URL strings and subtrees for URLs that are missing from the tree
+	:return: The missing URLs that are still missing afterwards (not including ignored URLs),
+	or None if a URL added for one of them ended up somewhere else in the tree.
+	"""
+	still_missing: list[tuple[str, URLTree]] = []
+	added_elsewhere = False
+	for missing_url_str, missing_url_tree in missing_urls:
 		# Don't cry wolf on anything listed as ignored for overrides (original case: prefs:root=ROOT)
 		if missing_url_str not in ignored_urls:
 			# If the missing URL was already used as an alias, then inherit the label from the equivalent URL
@@ -591,7 +820,7 @@ def find_missing_urls():
 							# This isn't a great heuristic for where the manifest with the real label is, depending on the area.
 							# But for now, it doesn't need to be any better.
 							new_override["manifest"] = str(subtree.root.manifest_path).removesuffix(".plist")
-							override_url_segments = list(get_path_segments(subtree.root.url))
+							override_url_segments = get_path_segments(subtree.root.url)
 							last_segment = override_url_segments[-1]
 							second_last_segment = override_url_segments[-2]
 							if last_segment == second_last_segment or last_segment == "#" + second_last_segment or last_segment == "#NumericalPreferenceSwitcherIdentifier" or last_segment == "#NumericalPreferencePickerGroupIdentifier":
@@ -611,10 +840,17 @@ def find_missing_urls():
 					child_url_hints = { k: v.root.label_id for k, v in missing_url_tree.urls.items() if v.root is not None }
 					if child_url_hints:
 						new_override["child_urls"] = child_url_hints
-					urls_to_override.append(new_override)
+					urls_to_override[missing_url_str] = new_override
+			if missing_url_tree.root is None:
+				still_missing.append((missing_url_str, missing_url_tree))
+				if found_gap_override or found_similar_child:
+					# The URL added for this one was put somewhere else in the tree (its path gets split differently),
+					# which can leave behind new gaps that only a full search will find
+					added_elsewhere = True
+	return None if added_elsewhere else still_missing
 
 # First search for missing items, before we add aliases
-find_missing_urls()
+remaining_missing_urls = find_missing_urls(tree.find_missing())
 
 # Load and add aliases to the tree (like prefs:root=CASTLE)
 # Aliases file structure:
@@ -629,8 +865,8 @@ find_missing_urls()
 # then applying the alias will throw an exception due to popping from an empty list.
 # So we actually need to run two searches to make sure everything works out correctly.
 # I hate running the search twice, but it just needs to work.
-with open(OVERRIDES / "alias.json", "r") as fp:
-	alias_overrides: dict[str, dict] = load_json(fp)
+with open(OVERRIDES / "alias.json", "rb") as fp:
+	alias_overrides: dict[str, dict] = loads_json(fp.read())
 for orig_url, aliases_info in alias_overrides.items():
 	aliases_for_url: list[str] = aliases_info["aliases"]
 	aliases_are_recursive: bool = aliases_info["recursive"]
@@ -641,8 +877,11 @@ for orig_url, aliases_info in alias_overrides.items():
 
 # Now that the aliases are applied, run the search for missing URLs again.
 # This will be what we actually write to the JSON.
+# Aliases don't add anything to the tree, so only the URLs that were still missing after the first search
+# need to be checked again, instead of walking the whole tree a second time.
+# That is, unless the first search added something in a different place than expected.
 urls_to_override.clear()
-find_missing_urls()
+find_missing_urls(remaining_missing_urls if remaining_missing_urls is not None else tree.find_missing())
 
 
 # Copy the relevant source files out of /System/Library for easier inspection,
@@ -650,7 +889,7 @@ find_missing_urls()
 # This is not strictly necessary, and the files should never be committed.
 # It's just a convenience for me.
 manifests_for_manual_search: set[str] = set()
-for needed_override in urls_to_override:
+for needed_override in urls_to_override.values():
 	override_manifest = needed_override["manifest"]
 	if type(override_manifest) is str and override_manifest not in manifests_for_manual_search:
 		# Copy manifest and the localization (just EN if it's the .lproj format) to version folder for easy transfer
@@ -667,8 +906,7 @@ for needed_override in urls_to_override:
 
 # Write out the overrides that need manual investigation.
 if len(urls_to_override) > 0:
-	with open(version_folder / "need-overrides.json", "w") as fp:
-		dump_json(urls_to_override, fp, indent=2)
+	write_file(version_folder / "need-overrides.json", dumps_json(list(urls_to_override.values()), indent=2))
 	print(f"{len(urls_to_override)} override{'' if len(urls_to_override) == 1 else 's'} needed")
 else:
 	print("No overrides needed")
@@ -679,24 +917,38 @@ else:
 # Currently, only Airplane Mode (prefs:root=ROOT#AIRPLANE_MODE) needs this.
 prefs_scheme = tree.urls.get("prefs")  # prefs:
 if prefs_scheme is not None:
-	root_root = prefs_scheme.urls.get("ROOT")  # prefs:root=ROOT
+	# Taking it out first keeps the rest of prefs in the same order, with ROOT's children added at the end
+	root_root = prefs_scheme.urls.pop("ROOT", None)  # prefs:root=ROOT
 	if root_root is not None:
 		prefs_scheme.urls.update(root_root.urls)
-		del prefs_scheme.urls["ROOT"]
 
 # Build and export JSON and Markdown lists for all locales
 for locale_code in all_locales:
-	locale_folder = version_folder / locale_code
-	makedirs(locale_folder, exist_ok=True)
+	(version_folder / locale_code).mkdir(exist_ok=True)
+# The per-locale files are handed off to a few writer threads, so the next scheme can be built while they're written.
+with ThreadPoolExecutor(max_workers=FILE_WRITING_THREADS) as writer:
+	pending_writes = []
 	# Separate schemes into their own files for the fully localized area.
 	for scheme, scheme_subtree in tree.urls.items():
-		localized_tree = scheme_subtree.build_localized_tree(locale_code)
-		json_path = locale_folder / f"{scheme}.json"
-		with open(json_path, "w") as fp:
-			dump_json(localized_tree, fp, indent=None)
-		md_path = locale_folder / f"{scheme}.md"
-		with open(md_path, "w") as fp:
-			fp.write("\n".join(scheme_subtree.build_markdown_lines(locale_code)))
+		# Build the localized trees and Markdown lists for every locale in one pass over the scheme,
+		# then serialize them all into a flat list of files to write
+		scheme_exports = scheme_subtree.build_exports(all_locales)
+		# Untranslated locales share the fallback locale's exports, so each distinct export is only serialized once.
+		unique_exports = {id(exports): exports for exports in scheme_exports.values()}
+		# Each export is encoded here too, so every untranslated locale writes out the same bytes instead of encoding them again.
+		serialized_exports = {
+			exports_id: ((".json", dumps_json(localized_tree, indent=None).encode("utf-8")), (".md", "\n".join(markdown_lines).encode("utf-8")))
+			for exports_id, (localized_tree, markdown_lines) in unique_exports.items()
+		}
+		scheme_files = [
+			(version_folder / locale_code / f"{scheme}{extension}", contents)
+			for locale_code, exports in scheme_exports.items()
+			for extension, contents in serialized_exports[id(exports)]
+		]
+		pending_writes.extend(writer.submit(write_file, path, contents) for path, contents in scheme_files)
+	# Make sure any write errors aren't silently dropped
+	for pending_write in pending_writes:
+		pending_write.result()
 
 # For the top-level MD, JSON, and sorted JSON, include things from prefs and settings-navigation
 # since settings-navigation seems to be on the rise in iOS 26.
@@ -704,18 +956,16 @@ for locale_code in all_locales:
 combined_settings_tree = URLTree()
 # prefs is the primary scheme, at least for now
 combined_settings_tree.urls.update(tree.urls["prefs"].urls)
-for url_key, url_subtree in tree.urls["settings-navigation"].urls.items():
-	if url_subtree.root is not None and url_subtree.root.url in alias_localizations:
-		# If this URL was already added as an alias, don't add it to the main tree.
-		# It'll just be a duplicate.
-		continue
-	combined_settings_tree.urls[url_key] = url_subtree
+combined_settings_tree.urls.update({
+	url_key: url_subtree for url_key, url_subtree in tree.urls["settings-navigation"].urls.items()
+	# If this URL was already added as an alias, don't add it to the main tree.
+	# It'll just be a duplicate.
+	if url_subtree.root is None or url_subtree.root.url not in alias_localizations
+})
 
 # Save the combined Markdown list and JSONs
-with open("./settings-urls.md", "w") as fp:
-	fp.write("\n".join(combined_settings_tree.build_markdown_lines(FALLBACK_LOCALE)))
-localized_tree = combined_settings_tree.build_localized_tree(FALLBACK_LOCALE)
-with open("./settings-urls.json", "w") as fp:
-	dump_json(localized_tree, fp, indent=None)
-with open("./settings-urls-sorted.json", "w") as fp:
-	dump_json(localized_tree, fp, sort_keys=True, indent=4)
\ No newline at end of file
+# All three come from the same walk of the tree.
+localized_tree, markdown_lines = combined_settings_tree.build_exports((FALLBACK_LOCALE,))[FALLBACK_LOCALE]
+write_file("./settings-urls.md", "\n".join(markdown_lines))
+write_file("./settings-urls.json", dumps_json(localized_tree, indent=None))
+write_file("./settings-urls-sorted.json", dumps_json(localized_tree, sort_keys=True, indent=4))
\ No newline at end of file